@@ -1,26 +1,23 @@
-import dotenv from 'dotenv';
-import { AgentConfig, Task, ScanResult, EnhancementResult, ModuleGenerationResult, ExecutionMode, AgentType } from '../types';
+import { AgentConfig, AIRequest, Task, ScanResult, EnhancementResult, ModuleGenerationResult, ExecutionMode, AgentType } from '../types';
 import { Logger } from './logger/logger';
 import { TaskManager } from './tasks/taskManager';
 import { MemoryManager } from './memory/memoryManager';
 import { AIClient } from './engines/AIClient';
-import { ScannerAgent } from './agents/scanner';
-import { ImproverAgent } from './agents/improver';
-import { GeneratorAgent } from './agents/generator';
+import { appConfig } from './config/config';
+import type { ScannerAgent } from './agents/scanner';
+import type { ImproverAgent } from './agents/improver';
+import type { GeneratorAgent } from './agents/generator';
 import { createClient } from '@supabase/supabase-js';
 import { v4 as uuidv4 } from 'uuid';
 
-// Load environment variables
-dotenv.config();
-
 export class ClaudeAgentSystem {
   private logger: Logger;
   private taskManager: TaskManager;
   private memoryManager: MemoryManager;
   private aiClient: AIClient;
-  private scannerAgent: ScannerAgent;
-  private improverAgent: ImproverAgent;
-  private generatorAgent: GeneratorAgent;
+  private scannerAgent?: ScannerAgent;
+  private improverAgent?: ImproverAgent;
+  private generatorAgent?: GeneratorAgent;
   private supabase: any;
   private isRunning: boolean = false;
   private currentProject?: { id: string; name: string };
@@ -32,14 +29,12 @@ export class ClaudeAgentSystem {
     this.memoryManager = new MemoryManager(this.logger);
     this.aiClient = new AIClient(this.logger);
 
-    // Initialize sub-agents
-    this.scannerAgent = new ScannerAgent(this.aiClient, this.logger, this.memoryManager);
-    this.improverAgent = new ImproverAgent(this.aiClient, this.logger, this.memoryManager);
-    this.generatorAgent = new GeneratorAgent(this.aiClient, this.logger, this.memoryManager);
+    // Sub-agents are loaded on first use (see getScannerAgent etc.) so a
+    // scan-only run or the API server's startup doesn't pay for all three
 
     // Initialize Supabase client
-    const supabaseUrl = process.env.SUPABASE_URL;
-    const supabaseKey = process.env.SUPABASE_SERVICE_ROLE_KEY;
+    const supabaseUrl = appConfig.supabaseUrl;
+    const supabaseKey = appConfig.supabaseServiceRoleKey;
 
     if (!supabaseUrl || !supabaseKey) {
       throw new Error('SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables are required');
@@ -157,8 +152,8 @@ export class ClaudeAgentSystem {
       ai_engine: config.aiEngine,
       target_files: config.options?.targetFiles,
       exclude_patterns: config.options?.excludePatterns,
-      max_concurrent_tasks: config.options?.maxConcurrentTasks || parseInt(process.env.MAX_CONCURRENT_TASKS || '3'),
-      timeout_ms: config.options?.timeoutMs || parseInt(process.env.TASK_TIMEOUT_MS || '300000')
+      max_concurrent_tasks: config.options?.maxConcurrentTasks || appConfig.maxConcurrentTasks,
+      timeout_ms: config.options?.timeoutMs || appConfig.taskTimeoutMs
     };
 
     return await this.taskManager.createWorkflow(projectId, config.mode, inputData);
@@ -226,7 +221,7 @@ export class ClaudeAgentSystem {
       await this.taskManager.startTask(scanTask.id);
       this.logger.setContext(workflow.project_id, scanTask.id);
 
-      const scanResult = await this.scannerAgent.scan(scanTask);
+      const scanResult = await (await this.getScannerAgent()).scan(scanTask);
 
       await this.taskManager.completeTask(
         scanTask.id,
@@ -266,7 +261,7 @@ export class ClaudeAgentSystem {
     // Step 1: Scan
     const scanTask = await this.createSubTask(workflow, 'scan', 'scanner', workflow.input_data);
     const scanResult = await this.executeSubTask(scanTask, async (task) => {
-      return await this.scannerAgent.scan(task);
+      return await (await this.getScannerAgent()).scan(task);
     });
 
     // Step 2: Improve based on scan results
@@ -275,7 +270,7 @@ export class ClaudeAgentSystem {
       scan_results: scanResult
     });
     const enhancementResult = await this.executeSubTask(improveTask, async (task) => {
-      return await this.improverAgent.improve(task);
+      return await (await this.getImproverAgent()).improve(task);
     });
 
     await this.logger.info('orchestrator', 'Enhance workflow completed successfully', {
@@ -306,7 +301,7 @@ export class ClaudeAgentSystem {
     });
 
     const generationResult = await this.executeSubTask(generateTask, async (task) => {
-      return await this.generatorAgent.generate(task);
+      return await (await this.getGeneratorAgent()).generate(task);
     });
 
     await this.logger.info('orchestrator', 'Module generation workflow completed successfully', {
@@ -334,7 +329,7 @@ export class ClaudeAgentSystem {
     // Step 1: Scan
     const scanTask = await this.createSubTask(workflow, 'scan', 'scanner', workflow.input_data);
     const scanResult = await this.executeSubTask(scanTask, async (task) => {
-      return await this.scannerAgent.scan(task);
+      return await (await this.getScannerAgent()).scan(task);
     });
 
     // Step 2: Improve based on scan results
@@ -343,7 +338,7 @@ export class ClaudeAgentSystem {
       scan_results: scanResult
     });
     const enhancementResult = await this.executeSubTask(improveTask, async (task) => {
-      return await this.improverAgent.improve(task);
+      return await (await this.getImproverAgent()).improve(task);
     });
 
     // Step 3: Generate modules based on scan and enhancement results
@@ -355,7 +350,7 @@ export class ClaudeAgentSystem {
       module_request: moduleRequest
     });
     const generationResult = await this.executeSubTask(generateTask, async (task) => {
-      return await this.generatorAgent.generate(task);
+      return await (await this.getGeneratorAgent()).generate(task);
     });
 
     await this.logger.info('orchestrator', 'Full workflow completed successfully', {
@@ -374,6 +369,39 @@ export class ClaudeAgentSystem {
     } as any;
   }
 
+  /**
+   * Lazily load and construct the scanner agent
+   */
+  private async getScannerAgent(): Promise<ScannerAgent> {
+    if (!this.scannerAgent) {
+      const { ScannerAgent } = await import('./agents/scanner');
+      this.scannerAgent = new ScannerAgent(this.aiClient, this.logger, this.memoryManager);
+    }
+    return this.scannerAgent;
+  }
+
+  /**
+   * Lazily load and construct the improver agent
+   */
+  private async getImproverAgent(): Promise<ImproverAgent> {
+    if (!this.improverAgent) {
+      const { ImproverAgent } = await import('./agents/improver');
+      this.improverAgent = new ImproverAgent(this.aiClient, this.logger, this.memoryManager);
+    }
+    return this.improverAgent;
+  }
+
+  /**
+   * Lazily load and construct the generator agent
+   */
+  private async getGeneratorAgent(): Promise<GeneratorAgent> {
+    if (!this.generatorAgent) {
+      const { GeneratorAgent } = await import('./agents/generator');
+      this.generatorAgent = new GeneratorAgent(this.aiClient, this.logger, this.memoryManager);
+    }
+    return this.generatorAgent;
+  }
+
   /**
    * Create a sub-task for workflow execution
    */
@@ -521,7 +549,7 @@ export class ClaudeAgentSystem {
       }
 
       // Cleanup old logs and memories if configured
-      const retentionDays = parseInt(process.env.MEMORY_RETENTION_DAYS || '30');
+      const retentionDays = appConfig.memoryRetentionDays;
       await this.logger.cleanupOldLogs(retentionDays);
       await this.memoryManager.cleanupOldMemories(retentionDays);
 
@@ -566,6 +594,20 @@ export class ClaudeAgentSystem {
     };
   }
 
+  /**
+   * Stream a one-off AI completion straight from the shared client
+   */
+  public streamAIResponse(request: AIRequest): AsyncGenerator<string> {
+    return this.aiClient.streamResponse(request);
+  }
+
+  /**
+   * Release long-lived resources such as pooled AI connections
+   */
+  public shutdown(): void {
+    this.aiClient.close();
+  }
+
   /**
    * Get active tasks
    */
@@ -5,6 +5,7 @@ import { ScanResult, FileAnalysis, Task, CodeIssue, Opportunity } from '../../ty
 import { AIClient } from '../engines/AIClient';
 import { Logger } from '../logger/logger';
 import { MemoryManager } from '../memory/memoryManager';
+import { appConfig } from '../config/config';
 
 export class ScannerAgent {
   private aiClient: AIClient;
@@ -109,7 +110,7 @@ export class ScannerAgent {
       }
 
       // Filter out files that are too large
-      const maxFileSize = parseInt(process.env.MAX_FILE_SIZE_BYTES || '1048576'); // 1MB default
+      const maxFileSize = appConfig.maxFileSizeBytes;
       const validFiles: string[] = [];
 
       for (const file of files) {
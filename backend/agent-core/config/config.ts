@@ -0,0 +1,42 @@
+import dotenv from 'dotenv';
+import { AIEngine } from '../../types';
+
+// Load environment variables before anything below reads them
+dotenv.config();
+
+export interface AppConfig {
+  readonly nodeEnv: string;
+  readonly port: number;
+  readonly webConcurrency: number;
+  readonly frontendUrls: readonly string[];
+  readonly logLevel: string;
+  readonly supabaseUrl?: string;
+  readonly supabaseServiceRoleKey?: string;
+  readonly anthropicApiKey?: string;
+  readonly defaultAiEngine: AIEngine;
+  readonly maxConcurrentTasks: number;
+  readonly taskTimeoutMs: number;
+  readonly maxRetryAttempts: number;
+  readonly memoryRetentionDays: number;
+  readonly maxFileSizeBytes: number;
+}
+
+// Read and coerce the environment once at startup so request paths never
+// touch process.env or re-parse numbers
+export const appConfig: AppConfig = Object.freeze({
+  nodeEnv: process.env.NODE_ENV || 'development',
+  port: parseInt(process.env.PORT || '3001'),
+  webConcurrency: Math.max(1, parseInt(process.env.WEB_CONCURRENCY || '1')),
+  // FRONTEND_URL may list several comma-separated origins
+  frontendUrls: Object.freeze((process.env.FRONTEND_URL || 'http://localhost:3000').split(',').map(origin => origin.trim())),
+  logLevel: (process.env.LOG_LEVEL || 'info').toLowerCase(),
+  supabaseUrl: process.env.SUPABASE_URL,
+  supabaseServiceRoleKey: process.env.SUPABASE_SERVICE_ROLE_KEY,
+  anthropicApiKey: process.env.ANTHROPIC_API_KEY,
+  defaultAiEngine: (process.env.DEFAULT_AI_ENGINE as AIEngine) || 'claude',
+  maxConcurrentTasks: parseInt(process.env.MAX_CONCURRENT_TASKS || '3'),
+  taskTimeoutMs: parseInt(process.env.TASK_TIMEOUT_MS || '300000'), // 5 minutes default
+  maxRetryAttempts: parseInt(process.env.MAX_RETRY_ATTEMPTS || '2'),
+  memoryRetentionDays: parseInt(process.env.MEMORY_RETENTION_DAYS || '30'),
+  maxFileSizeBytes: parseInt(process.env.MAX_FILE_SIZE_BYTES || '1048576') // 1MB default
+});
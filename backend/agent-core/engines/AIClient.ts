@@ -1,34 +1,196 @@
 import Anthropic from '@anthropic-ai/sdk';
+import { MessageCreateParamsNonStreaming } from '@anthropic-ai/sdk/resources/beta/messages';
+import { Agent as HttpsAgent } from 'https';
+import { createHash } from 'crypto';
 import { AIRequest, AIResponse, AIEngine, LogLevel } from '../../types';
 import { Logger } from '../logger/logger';
+import { appConfig } from '../config/config';
+import { claudeRequestSeconds, recordClaudeTokens } from '../metrics/metrics';
+
+// Prompt caching is not enabled: every system prompt here is far below
+// Anthropic's minimum cacheable prefix (1024 tokens on Sonnet, 2048 on
+// Haiku), so a cache_control breakpoint would never create an entry
+const DEFAULT_SYSTEM_PROMPT = `You are an autonomous AI agent specialized in code analysis, UX improvement, and module generation. You are part of a larger agent system that helps developers optimize their projects.
+
+Key capabilities:
+- Structural code analysis and architectural review
+- UX/UI enhancement suggestions with modern design patterns
+- Component and module generation with best practices
+- Performance optimization recommendations
+- Accessibility improvements
+
+Guidelines:
+- Provide specific, actionable suggestions
+- Focus on modern web development best practices
+- Consider performance, maintainability, and user experience
+- Use TypeScript and React patterns when applicable
+- Be concise but thorough in your analysis
+- When generating code, ensure it's production-ready and well-documented
+
+When asked to analyze code:
+1. Understand the structure and purpose
+2. Identify potential improvements
+3. Suggest specific changes with reasoning
+4. Consider impact on overall system architecture
+
+When generating modules:
+1. Follow established patterns in the codebase
+2. Include proper TypeScript types
+3. Add comprehensive documentation
+4. Consider testing requirements
+5. Ensure accessibility compliance`;
+
+// Per-agent system prompts and JSON response schemas. Neither interpolates
+// request data, so both are built once at load time; the schema is appended
+// to the user prompt, after the request-specific content.
+const AGENT_SYSTEM_PROMPTS = {
+  scanner: `You are a senior software architect performing a comprehensive code analysis. Focus on identifying structural issues, optimization opportunities, and architectural improvements.`,
+
+  improver: `You are a UX specialist focused on improving user interfaces and interactions. Consider modern design patterns, accessibility standards, and performance optimizations.`,
+
+  generator: `You are a code generation specialist creating high-quality, production-ready modules. Follow modern development practices, include proper TypeScript types, and ensure accessibility compliance.`
+} as const;
+
+const AGENT_RESPONSE_SCHEMAS = {
+  scanner: `Please provide a JSON response with the following structure:
+{
+  "structure_analysis": {
+    "file_count": number,
+    "component_count": number,
+    "complexity_score": number (1-10),
+    "architecture_patterns": string[],
+    "dependencies": [{"name": string, "version": string, "type": "production|development"}]
+  },
+  "issues": [
+    {
+      "type": "performance|accessibility|maintainability|security",
+      "severity": "low|medium|high|critical",
+      "file_path": string,
+      "line_number": number,
+      "description": string,
+      "suggestion": string
+    }
+  ],
+  "opportunities": [
+    {
+      "type": "ux_improvement|performance_optimization|feature_addition",
+      "impact": "low|medium|high",
+      "effort": "low|medium|high",
+      "description": string,
+      "implementation_suggestion": string
+    }
+  ],
+  "metrics": {
+    "lines_of_code": number,
+    "cyclomatic_complexity": number,
+    "maintainability_index": number
+  }
+}`,
+
+  improver: `Please provide a JSON response with the following structure:
+{
+  "improvements": [
+    {
+      "component_path": string,
+      "enhancement_type": "visual|interactive|accessibility|performance",
+      "description": string,
+      "code_changes": [
+        {
+          "file_path": string,
+          "change_type": "modify|add|delete",
+          "original_code": string,
+          "new_code": string,
+          "line_number": number
+        }
+      ],
+      "impact_assessment": {
+        "user_experience": number (1-10),
+        "performance_impact": number (-5 to +5),
+        "maintainability": number (1-10),
+        "implementation_effort": number (1-10)
+      }
+    }
+  ],
+  "ux_score_before": number (1-10),
+  "ux_score_after": number (1-10),
+  "implementation_plan": [
+    {
+      "order": number,
+      "description": string,
+      "estimated_time_minutes": number,
+      "dependencies": string[]
+    }
+  ]
+}`,
+
+  generator: `Please provide a JSON response with the following structure:
+{
+  "generated_modules": [
+    {
+      "name": string,
+      "type": "component|service|utility|hook",
+      "file_path": string,
+      "code": string,
+      "dependencies": string[],
+      "props_interface": string,
+      "usage_example": string,
+      "tests": string
+    }
+  ],
+  "integration_instructions": string[],
+  "testing_suggestions": string[]
+}`
+} as const;
+
+export interface AIClientOptions {
+  // Shared keep-alive agent; one is created per client when not supplied
+  httpAgent?: HttpsAgent;
+}
 
 export class AIClient {
   private anthropic: Anthropic;
+  private httpAgent: HttpsAgent;
   private logger: Logger;
+  private responseCache: Map<string, string> = new Map(); // sha256(cache key) -> content, in LRU order
+  private maxResponseCacheSize: number = 256;
+  private inflightRequests: Map<string, Promise<AIResponse>> = new Map(); // sha256(cache key) -> pending call
   private requestCount: number = 0;
   private totalTokensUsed: number = 0;
   private totalCost: number = 0;
 
+  // Newer snapshots have lower time-to-first-token than the 3.0 models
+  static readonly MODEL_FAST = 'claude-3-5-haiku-latest';
+  static readonly MODEL_QUALITY = 'claude-3-5-sonnet-latest';
+
   // Claude pricing (as of 2024) - tokens per $1
-  private readonly CLAUDE_PRICING = {
-    'claude-3-5-sonnet-20241022': {
+  private readonly CLAUDE_PRICING: Record<string, { input: number; output: number }> = {
+    [AIClient.MODEL_QUALITY]: {
       input: 1000000 / 3.00,  // $3 per million input tokens
       output: 1000000 / 15.00  // $15 per million output tokens
     },
-    'claude-3-haiku-20240307': {
-      input: 1000000 / 0.25,  // $0.25 per million input tokens
-      output: 1000000 / 1.25  // $1.25 per million output tokens
+    [AIClient.MODEL_FAST]: {
+      input: 1000000 / 0.80,  // $0.80 per million input tokens
+      output: 1000000 / 4.00  // $4 per million output tokens
     }
   };
 
-  constructor(logger: Logger) {
-    const apiKey = process.env.ANTHROPIC_API_KEY;
+  constructor(logger: Logger, options: AIClientOptions = {}) {
+    const apiKey = appConfig.anthropicApiKey;
     if (!apiKey) {
       throw new Error('ANTHROPIC_API_KEY environment variable is required');
     }
 
+    // Pool connections so each request reuses a warm TLS socket instead of
+    // paying a fresh handshake, and cap sockets so load can't churn them
+    this.httpAgent = options.httpAgent || new HttpsAgent({
+      keepAlive: true,
+      maxSockets: 100,
+      maxFreeSockets: 20
+    });
+
     this.anthropic = new Anthropic({
       apiKey: apiKey,
+      httpAgent: this.httpAgent
     });
     
     this.logger = logger;
@@ -49,7 +211,9 @@ export class AIClient {
       this.totalTokensUsed += response.tokens_used;
       this.totalCost += response.cost_estimate;
 
-      await this.logger.log('info', 'orchestrator', {
+      // Don't hold the caller on the logbook/Supabase writes - the Claude
+      // round trip is already done and the logger handles its own failures
+      this.logger.log('info', 'orchestrator', {
         message: `AI request completed successfully`,
         data: {
           model: response.model,
@@ -87,39 +251,76 @@ export class AIClient {
     // Choose model based on request complexity
     const model = this.selectClaudeModel(request);
     
+    const userPrompt = this.buildClaudePrompt(request);
+    const params = this.buildClaudeParams(request, model, userPrompt);
+
+    // Key on every parameter that shapes the completion, so a response is
+    // never replayed for a request with a different length or temperature
+    const hashedKey = this.hashCacheKey(
+      `${params.model}|${params.max_tokens}|${params.temperature}|${params.system}|${userPrompt}`
+    );
+    const cachedContent = this.checkCache(hashedKey);
+    if (cachedContent !== null) {
+      return {
+        content: cachedContent,
+        tokens_used: 0,
+        model,
+        cost_estimate: 0,
+        response_time_ms: Date.now() - startTime,
+        confidence_score: this.calculateConfidenceScore(cachedContent, request)
+      };
+    }
+
+    // Identical requests already in flight share one API call; the cache key
+    // covers every sampling parameter, so only true duplicates coalesce
+    const pending = this.inflightRequests.get(hashedKey);
+    if (pending) {
+      const shared = await pending;
+      // The first caller already accounted for the tokens and cost
+      return {
+        ...shared,
+        tokens_used: 0,
+        cost_estimate: 0,
+        response_time_ms: Date.now() - startTime
+      };
+    }
+
+    const apiCall = this.requestClaude(request, params, hashedKey, startTime);
+    this.inflightRequests.set(hashedKey, apiCall);
+
     try {
-      const systemPrompt = request.system_prompt || this.getDefaultSystemPrompt();
-      
-      const response = await (this.anthropic as any).messages.create({
-        model: model,
-        max_tokens: request.max_tokens || 4000,
-        temperature: request.temperature || 0.1,
-        system: systemPrompt,
-        messages: [
-          {
-            role: 'user',
-            content: this.buildClaudePrompt(request)
-          }
-        ]
-      });
+      return await apiCall;
+    } finally {
+      this.inflightRequests.delete(hashedKey);
+    }
+  }
 
-      const responseTime = Date.now() - startTime;
-      const inputTokens = response.usage.input_tokens;
-      const outputTokens = response.usage.output_tokens;
-      const totalTokens = inputTokens + outputTokens;
+  private async requestClaude(
+    request: AIRequest,
+    params: MessageCreateParamsNonStreaming,
+    hashedKey: string,
+    startTime: number
+  ): Promise<AIResponse> {
+    const model = params.model;
+    const endTimer = claudeRequestSeconds.startTimer({ model, stage: request.stage || 'default' });
 
-      // Calculate cost
-      const pricing = this.CLAUDE_PRICING[model as keyof typeof this.CLAUDE_PRICING];
-      const inputCost = inputTokens / pricing.input;
-      const outputCost = outputTokens / pricing.output;
-      const totalCost = inputCost + outputCost;
+    try {
+      const response = await this.anthropic.beta.messages.create(params);
+
+      const responseTime = Date.now() - startTime;
+      recordClaudeTokens(model, response.usage);
+      const { totalTokens, totalCost } = this.calculateUsage(model, response.usage);
 
       // Extract content
       const content = response.content
-        .filter((block: any) => block.type === 'text')
-        .map((block: any) => (block as any).text)
+        .filter(block => block.type === 'text')
+        .map(block => block.text)
         .join('\n');
 
+      if (this.isReplayable(response.stop_reason, content, request)) {
+        this.rememberResponse(hashedKey, content);
+      }
+
       return {
         content,
         tokens_used: totalTokens,
@@ -130,33 +331,202 @@ export class AIClient {
       };
 
     } catch (error) {
-      const responseTime = Date.now() - startTime;
-      
-      if (error instanceof Anthropic.APIError) {
-        // Handle specific Claude API errors
-        if (error.status === 429) {
-          throw new Error(`Claude API rate limit exceeded. Please wait before retrying.`);
-        } else if (error.status === 401) {
-          throw new Error(`Claude API authentication failed. Please check your API key.`);
-        } else if (error.status === 400) {
-          throw new Error(`Claude API request invalid: ${error.message}`);
+      throw this.toClaudeError(error);
+    } finally {
+      endTimer();
+    }
+  }
+
+  /**
+   * Stream completion text as Claude generates it, so callers can forward
+   * the first tokens right away instead of waiting for the full response.
+   * Usage stats are recorded when the stream ends, including when the
+   * consumer stops reading early and the upstream request is aborted; in
+   * that case output tokens are a lower-bound estimate.
+   */
+  async *streamResponse(request: AIRequest): AsyncGenerator<string> {
+    const startTime = Date.now();
+    this.requestCount++;
+
+    const model = this.selectClaudeModel(request);
+    const userPrompt = this.buildClaudePrompt(request);
+    const usage = { input_tokens: 0, output_tokens: 0 };
+    let textDeltas = 0;
+    const endTimer = claudeRequestSeconds.startTimer({ model, stage: request.stage || 'default' });
+    // Stays 'cancelled' if the consumer returns before the stream finishes
+    let outcome: 'completed' | 'failed' | 'cancelled' = 'cancelled';
+
+    const stream = this.anthropic.beta.messages.stream(this.buildClaudeParams(request, model, userPrompt));
+    // The SDK raises errors and aborts as unhandled rejections unless a
+    // completion promise exists, and its iterator ends quietly on failure
+    const finished = stream.done();
+    finished.catch(() => {});
+
+    try {
+      for await (const event of stream) {
+        if (event.type === 'message_start') {
+          usage.input_tokens = event.message.usage.input_tokens;
+        } else if (event.type === 'message_delta') {
+          usage.output_tokens = event.usage.output_tokens;
+        } else if (event.type === 'content_block_delta') {
+          textDeltas++;
+          yield event.delta.text;
+        }
+      }
+
+      await finished;
+      outcome = 'completed';
+    } catch (error) {
+      outcome = 'failed';
+      const claudeError = this.toClaudeError(error);
+
+      await this.logger.log('error', 'orchestrator', {
+        message: `AI stream failed`,
+        data: {
+          model,
+          error: claudeError.message,
+          response_time_ms: Date.now() - startTime
+        },
+        error_stack: claudeError.stack
+      });
+
+      throw claudeError;
+    } finally {
+      endTimer();
+
+      // Output usage only arrives in the final message_delta. If the stream
+      // stopped before it, count one token per text delta received - each
+      // carries at least one, so this undercounts rather than overbills
+      const outputEstimated = usage.output_tokens === 0 && textDeltas > 0;
+      if (outputEstimated) {
+        usage.output_tokens = textDeltas;
+      }
+
+      recordClaudeTokens(model, usage);
+      const { totalTokens, totalCost } = this.calculateUsage(model, usage);
+      this.totalTokensUsed += totalTokens;
+      this.totalCost += totalCost;
+
+      if (outcome !== 'failed') {
+        this.logger.log('info', 'orchestrator', {
+          message: outcome === 'completed' ? `AI stream completed successfully` : `AI stream cancelled by client`,
+          data: {
+            model,
+            tokens_used: totalTokens,
+            cost_estimate: totalCost,
+            output_tokens_estimated: outputEstimated,
+            response_time_ms: Date.now() - startTime,
+            total_requests: this.requestCount,
+            total_tokens: this.totalTokensUsed,
+            total_cost: this.totalCost
+          }
+        });
+      }
+    }
+  }
+
+  private buildClaudeParams(request: AIRequest, model: string, userPrompt: string): MessageCreateParamsNonStreaming {
+    return {
+      model: model,
+      max_tokens: request.max_tokens || 4000,
+      temperature: request.temperature ?? 0.1,
+      // A stage prompt replaces the default rather than extending it, so
+      // agent behaviour is set entirely by the stage that made the request
+      system: request.system_prompt || DEFAULT_SYSTEM_PROMPT,
+      messages: [
+        {
+          role: 'user',
+          content: userPrompt
         }
+      ]
+    };
+  }
+
+  private calculateUsage(model: string, usage: any) {
+    const inputTokens = usage.input_tokens || 0;
+    const outputTokens = usage.output_tokens || 0;
+    const totalTokens = inputTokens + outputTokens;
+
+    // Calculate cost
+    const pricing = this.CLAUDE_PRICING[model];
+    const inputCost = inputTokens / pricing.input;
+    const outputCost = outputTokens / pricing.output;
+
+    return { totalTokens, totalCost: inputCost + outputCost };
+  }
+
+  private toClaudeError(error: unknown): Error {
+    if (error instanceof Anthropic.APIError) {
+      // Handle specific Claude API errors
+      if (error.status === 429) {
+        return new Error(`Claude API rate limit exceeded. Please wait before retrying.`);
+      } else if (error.status === 401) {
+        return new Error(`Claude API authentication failed. Please check your API key.`);
+      } else if (error.status === 400) {
+        return new Error(`Claude API request invalid: ${error.message}`);
       }
+    }
 
-      throw new Error(`Claude API error: ${error instanceof Error ? error.message : String(error)}`);
+    return new Error(`Claude API error: ${error instanceof Error ? error.message : String(error)}`);
+  }
+
+  /**
+   * Only responses the agents can actually use are cached. A truncated
+   * reply, or JSON the agents can't parse, would otherwise be replayed on
+   * every retry and pin the stage to its fallback result.
+   */
+  private isReplayable(stopReason: string | null, content: string, request: AIRequest): boolean {
+    if (stopReason !== 'end_turn') return false;
+    if (request.response_format !== 'json') return true;
+
+    try {
+      JSON.parse(content);
+      return true;
+    } catch {
+      return false;
+    }
+  }
+
+  private checkCache(hashedKey: string): string | null {
+    const hit = this.responseCache.get(hashedKey);
+    if (hit === undefined) return null;
+
+    this.rememberResponse(hashedKey, hit);
+    return hit;
+  }
+
+  private hashCacheKey(key: string): string {
+    return createHash('sha256').update(key).digest('hex');
+  }
+
+  private rememberResponse(hashedKey: string, content: string): void {
+    // Map keeps insertion order, so re-inserting marks the entry most recent
+    // and the first key is always the least recently used
+    this.responseCache.delete(hashedKey);
+    this.responseCache.set(hashedKey, content);
+
+    if (this.responseCache.size > this.maxResponseCacheSize) {
+      const oldestKey = this.responseCache.keys().next().value;
+      if (oldestKey !== undefined) {
+        this.responseCache.delete(oldestKey);
+      }
     }
   }
 
   private selectClaudeModel(request: AIRequest): string {
+    if (request.fast) {
+      return AIClient.MODEL_FAST;
+    }
+
     // Use Haiku for simple requests, Sonnet for complex analysis
     const promptLength = (request.prompt + (request.context || '')).length;
     const hasComplexContext = request.context && request.context.length > 5000;
     const needsJsonResponse = request.response_format === 'json';
     
     if (promptLength > 10000 || hasComplexContext || needsJsonResponse) {
-      return 'claude-3-5-sonnet-20241022'; // Most capable for complex tasks
+      return AIClient.MODEL_QUALITY; // Most capable for complex tasks
     } else {
-      return 'claude-3-haiku-20240307'; // Faster and cheaper for simple tasks
+      return AIClient.MODEL_FAST; // Faster and cheaper for simple tasks
     }
   }
 
@@ -176,38 +546,6 @@ export class AIClient {
     return prompt;
   }
 
-  private getDefaultSystemPrompt(): string {
-    return `You are an autonomous AI agent specialized in code analysis, UX improvement, and module generation. You are part of a larger agent system that helps developers optimize their projects.
-
-Key capabilities:
-- Structural code analysis and architectural review
-- UX/UI enhancement suggestions with modern design patterns
-- Component and module generation with best practices
-- Performance optimization recommendations
-- Accessibility improvements
-
-Guidelines:
-- Provide specific, actionable suggestions
-- Focus on modern web development best practices
-- Consider performance, maintainability, and user experience
-- Use TypeScript and React patterns when applicable
-- Be concise but thorough in your analysis
-- When generating code, ensure it's production-ready and well-documented
-
-When asked to analyze code:
-1. Understand the structure and purpose
-2. Identify potential improvements
-3. Suggest specific changes with reasoning
-4. Consider impact on overall system architecture
-
-When generating modules:
-1. Follow established patterns in the codebase
-2. Include proper TypeScript types
-3. Add comprehensive documentation
-4. Consider testing requirements
-5. Ensure accessibility compliance`;
-  }
-
   private calculateConfidenceScore(content: string, request: AIRequest): number {
     // Simple heuristic-based confidence scoring
     let score = 0.7; // Base confidence
@@ -243,42 +581,10 @@ When generating modules:
 
 Files to analyze: ${filePaths.join(', ')}
 
-Please provide a JSON response with the following structure:
-{
-  "structure_analysis": {
-    "file_count": number,
-    "component_count": number,
-    "complexity_score": number (1-10),
-    "architecture_patterns": string[],
-    "dependencies": [{"name": string, "version": string, "type": "production|development"}]
-  },
-  "issues": [
-    {
-      "type": "performance|accessibility|maintainability|security",
-      "severity": "low|medium|high|critical",
-      "file_path": string,
-      "line_number": number,
-      "description": string,
-      "suggestion": string
-    }
-  ],
-  "opportunities": [
-    {
-      "type": "ux_improvement|performance_optimization|feature_addition",
-      "impact": "low|medium|high",
-      "effort": "low|medium|high",
-      "description": string,
-      "implementation_suggestion": string
-    }
-  ],
-  "metrics": {
-    "lines_of_code": number,
-    "cyclomatic_complexity": number,
-    "maintainability_index": number
-  }
-}`,
+${AGENT_RESPONSE_SCHEMAS.scanner}`,
       context: projectContext,
-      system_prompt: `You are a senior software architect performing a comprehensive code analysis. Focus on identifying structural issues, optimization opportunities, and architectural improvements.`,
+      system_prompt: AGENT_SYSTEM_PROMPTS.scanner,
+      stage: 'scanner',
       response_format: 'json',
       max_tokens: 6000
     };
@@ -292,42 +598,9 @@ ${JSON.stringify(scanResults, null, 2)}
 
 ${targetComponent ? `Focus specifically on improving: ${targetComponent}` : ''}
 
-Please provide a JSON response with the following structure:
-{
-  "improvements": [
-    {
-      "component_path": string,
-      "enhancement_type": "visual|interactive|accessibility|performance",
-      "description": string,
-      "code_changes": [
-        {
-          "file_path": string,
-          "change_type": "modify|add|delete",
-          "original_code": string,
-          "new_code": string,
-          "line_number": number
-        }
-      ],
-      "impact_assessment": {
-        "user_experience": number (1-10),
-        "performance_impact": number (-5 to +5),
-        "maintainability": number (1-10),
-        "implementation_effort": number (1-10)
-      }
-    }
-  ],
-  "ux_score_before": number (1-10),
-  "ux_score_after": number (1-10),
-  "implementation_plan": [
-    {
-      "order": number,
-      "description": string,
-      "estimated_time_minutes": number,
-      "dependencies": string[]
-    }
-  ]
-}`,
-      system_prompt: `You are a UX specialist focused on improving user interfaces and interactions. Consider modern design patterns, accessibility standards, and performance optimizations.`,
+${AGENT_RESPONSE_SCHEMAS.improver}`,
+      system_prompt: AGENT_SYSTEM_PROMPTS.improver,
+      stage: 'improver',
       response_format: 'json',
       max_tokens: 8000
     };
@@ -342,24 +615,9 @@ Request: ${moduleRequest}
 ${existingPatterns ? `Existing patterns to follow: ${existingPatterns.join(', ')}` : ''}
 ${frameworks ? `Preferred frameworks: ${frameworks.join(', ')}` : ''}
 
-Please provide a JSON response with the following structure:
-{
-  "generated_modules": [
-    {
-      "name": string,
-      "type": "component|service|utility|hook",
-      "file_path": string,
-      "code": string,
-      "dependencies": string[],
-      "props_interface": string,
-      "usage_example": string,
-      "tests": string
-    }
-  ],
-  "integration_instructions": string[],
-  "testing_suggestions": string[]
-}`,
-      system_prompt: `You are a code generation specialist creating high-quality, production-ready modules. Follow modern development practices, include proper TypeScript types, and ensure accessibility compliance.`,
+${AGENT_RESPONSE_SCHEMAS.generator}`,
+      system_prompt: AGENT_SYSTEM_PROMPTS.generator,
+      stage: 'generator',
       response_format: 'json',
       max_tokens: 10000
     };
@@ -376,6 +634,11 @@ Please provide a JSON response with the following structure:
     };
   }
 
+  // Release pooled connections (call on process shutdown)
+  close() {
+    this.httpAgent.destroy();
+  }
+
   // Reset statistics (useful for testing or new sessions)
   resetStats() {
     this.requestCount = 0;
@@ -3,24 +3,38 @@ import { promises as fs } from 'fs';
 import path from 'path';
 import chalk from 'chalk';
 import { LogEntry, LogLevel, AgentType } from '../../types';
+import { appConfig } from '../config/config';
 import { v4 as uuidv4 } from 'uuid';
 
+const LOG_LEVEL_PRIORITY: Record<LogLevel, number> = {
+  debug: 0,
+  info: 1,
+  warn: 2,
+  error: 3,
+  critical: 4
+};
+
 export class Logger {
   private supabase: SupabaseClient;
   private logbookPath: string;
+  private minLevel: LogLevel;
   private projectId: string | null = null;
   private taskId: string | null = null;
 
   constructor() {
     // Initialize Supabase client
-    const supabaseUrl = process.env.SUPABASE_URL;
-    const supabaseKey = process.env.SUPABASE_SERVICE_ROLE_KEY;
+    const supabaseUrl = appConfig.supabaseUrl;
+    const supabaseKey = appConfig.supabaseServiceRoleKey;
 
     if (!supabaseUrl || !supabaseKey) {
       throw new Error('SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables are required');
     }
 
     this.supabase = createClient(supabaseUrl, supabaseKey);
+
+    const configuredLevel = appConfig.logLevel as LogLevel;
+    this.minLevel = configuredLevel in LOG_LEVEL_PRIORITY ? configuredLevel : 'info';
+
     this.logbookPath = path.join(process.cwd(), 'agent-core', 'logger', 'logs', 'logbook.md');
     
     // Ensure logs directory exists
@@ -67,6 +81,11 @@ This logbook tracks all activities of the autonomous agent system. Each session
       error_stack?: string;
     }
   ): Promise<void> {
+    // Skip formatting and all three sinks for entries below LOG_LEVEL
+    if (LOG_LEVEL_PRIORITY[level] < LOG_LEVEL_PRIORITY[this.minLevel]) {
+      return;
+    }
+
     const logEntry: LogEntry = {
       id: uuidv4(),
       timestamp: new Date().toISOString(),
@@ -79,17 +98,22 @@ This logbook tracks all activities of the autonomous agent system. Each session
       error_stack: data.error_stack
     };
 
+    // Pretty-print the payload once and share it between console and file
+    const formattedData = logEntry.data && Object.keys(logEntry.data).length > 0
+      ? JSON.stringify(logEntry.data, null, 2)
+      : undefined;
+
     // Log to console with colors
-    this.logToConsole(logEntry);
+    this.logToConsole(logEntry, formattedData);
 
     // Log to local markdown file
-    await this.logToFile(logEntry);
+    await this.logToFile(logEntry, formattedData);
 
     // Log to Supabase
     await this.logToSupabase(logEntry);
   }
 
-  private logToConsole(entry: LogEntry): void {
+  private logToConsole(entry: LogEntry, formattedData?: string): void {
     const timestamp = new Date(entry.timestamp).toLocaleTimeString();
     const agentColor = this.getAgentColor(entry.agent_type);
     const levelColor = this.getLevelColor(entry.level);
@@ -98,8 +122,8 @@ This logbook tracks all activities of the autonomous agent system. Each session
     
     console.log(`${prefix} ${entry.message}`);
     
-    if (entry.data && Object.keys(entry.data).length > 0) {
-      console.log(chalk.gray('  Data:'), JSON.stringify(entry.data, null, 2));
+    if (formattedData) {
+      console.log(chalk.gray('  Data:'), formattedData);
     }
     
     if (entry.error_stack) {
@@ -107,7 +131,7 @@ This logbook tracks all activities of the autonomous agent system. Each session
     }
   }
 
-  private async logToFile(entry: LogEntry): Promise<void> {
+  private async logToFile(entry: LogEntry, formattedData?: string): Promise<void> {
     try {
       const timestamp = new Date(entry.timestamp).toLocaleString();
       const taskInfo = entry.task_id ? ` (Task: ${entry.task_id.slice(0, 8)})` : '';
@@ -116,8 +140,8 @@ This logbook tracks all activities of the autonomous agent system. Each session
       let logLine = `### ${timestamp} - ${entry.level.toUpperCase()} - ${entry.agent_type.toUpperCase()}${taskInfo}${projectInfo}\n\n`;
       logLine += `**Message:** ${entry.message}\n\n`;
       
-      if (entry.data && Object.keys(entry.data).length > 0) {
-        logLine += `**Data:**\n\`\`\`json\n${JSON.stringify(entry.data, null, 2)}\n\`\`\`\n\n`;
+      if (formattedData) {
+        logLine += `**Data:**\n\`\`\`json\n${formattedData}\n\`\`\`\n\n`;
       }
       
       if (entry.error_stack) {
@@ -1,6 +1,7 @@
 import { createClient, SupabaseClient } from '@supabase/supabase-js';
 import { ProjectMemory, MemoryType } from '../../types';
 import { Logger } from '../logger/logger';
+import { appConfig } from '../config/config';
 import { v4 as uuidv4 } from 'uuid';
 
 export class MemoryManager {
@@ -10,8 +11,8 @@ export class MemoryManager {
   private maxCacheSize: number = 1000;
 
   constructor(logger: Logger) {
-    const supabaseUrl = process.env.SUPABASE_URL;
-    const supabaseKey = process.env.SUPABASE_SERVICE_ROLE_KEY;
+    const supabaseUrl = appConfig.supabaseUrl;
+    const supabaseKey = appConfig.supabaseServiceRoleKey;
 
     if (!supabaseUrl || !supabaseKey) {
       throw new Error('SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables are required');
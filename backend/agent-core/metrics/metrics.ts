@@ -0,0 +1,138 @@
+// Minimal Prometheus text-format registry. The backend only exports a
+// histogram and a counter, so rendering the exposition format here keeps
+// metrics free of an extra runtime dependency.
+
+type Labels = Record<string, string>;
+
+interface Metric {
+  render(): string;
+}
+
+function labelKey(labelNames: string[], labels: Labels): string {
+  return labelNames.map(name => labels[name] ?? '').join('\u0000');
+}
+
+function formatLabels(labelNames: string[], values: string[], extra: string = ''): string {
+  const pairs = labelNames.map((name, i) => `${name}="${values[i].replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n')}"`);
+  if (extra) pairs.push(extra);
+  return pairs.length > 0 ? `{${pairs.join(',')}}` : '';
+}
+
+class Counter implements Metric {
+  private values: Map<string, number> = new Map();
+
+  constructor(
+    private name: string,
+    private help: string,
+    private labelNames: string[]
+  ) {}
+
+  inc(labels: Labels, value: number = 1): void {
+    const key = labelKey(this.labelNames, labels);
+    this.values.set(key, (this.values.get(key) || 0) + value);
+  }
+
+  render(): string {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    for (const [key, value] of this.values) {
+      lines.push(`${this.name}${formatLabels(this.labelNames, key.split('\u0000'))} ${value}`);
+    }
+    return lines.join('\n');
+  }
+}
+
+class Histogram implements Metric {
+  private series: Map<string, { counts: number[]; sum: number; count: number }> = new Map();
+
+  constructor(
+    private name: string,
+    private help: string,
+    private labelNames: string[],
+    private buckets: number[]
+  ) {}
+
+  observe(labels: Labels, value: number): void {
+    const key = labelKey(this.labelNames, labels);
+    let entry = this.series.get(key);
+    if (!entry) {
+      entry = { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, entry);
+    }
+
+    this.buckets.forEach((bound, i) => {
+      if (value <= bound) entry!.counts[i]++;
+    });
+    entry.sum += value;
+    entry.count++;
+  }
+
+  // Returns a callback that records the elapsed seconds when invoked
+  startTimer(labels: Labels): () => void {
+    const start = process.hrtime.bigint();
+    return () => this.observe(labels, Number(process.hrtime.bigint() - start) / 1e9);
+  }
+
+  render(): string {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    for (const [key, entry] of this.series) {
+      const values = key.split('\u0000');
+      this.buckets.forEach((bound, i) => {
+        lines.push(`${this.name}_bucket${formatLabels(this.labelNames, values, `le="${bound}"`)} ${entry.counts[i]}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels(this.labelNames, values, 'le="+Inf"')} ${entry.count}`);
+      lines.push(`${this.name}_sum${formatLabels(this.labelNames, values)} ${entry.sum}`);
+      lines.push(`${this.name}_count${formatLabels(this.labelNames, values)} ${entry.count}`);
+    }
+    return lines.join('\n');
+  }
+}
+
+class MetricsRegistry {
+  readonly contentType = 'text/plain; version=0.0.4; charset=utf-8';
+  private registered: Metric[] = [];
+
+  register<T extends Metric>(metric: T): T {
+    this.registered.push(metric);
+    return metric;
+  }
+
+  metrics(): string {
+    return [...this.registered.map(metric => metric.render()), this.processMetrics()].join('\n') + '\n';
+  }
+
+  private processMetrics(): string {
+    const memory = process.memoryUsage();
+    const cpu = process.cpuUsage();
+    return [
+      '# HELP process_cpu_seconds_total Total user and system CPU time spent in seconds',
+      '# TYPE process_cpu_seconds_total counter',
+      `process_cpu_seconds_total ${(cpu.user + cpu.system) / 1e6}`,
+      '# HELP process_resident_memory_bytes Resident memory size in bytes',
+      '# TYPE process_resident_memory_bytes gauge',
+      `process_resident_memory_bytes ${memory.rss}`,
+      '# HELP nodejs_heap_size_used_bytes Process heap size used from Node.js in bytes',
+      '# TYPE nodejs_heap_size_used_bytes gauge',
+      `nodejs_heap_size_used_bytes ${memory.heapUsed}`
+    ].join('\n');
+  }
+}
+
+export const metricsRegistry = new MetricsRegistry();
+
+export const claudeRequestSeconds = metricsRegistry.register(new Histogram(
+  'claude_request_seconds',
+  'Claude API request latency in seconds',
+  ['model', 'stage'],
+  [0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120]
+));
+
+export const claudeTokensTotal = metricsRegistry.register(new Counter(
+  'claude_tokens_total',
+  'Claude tokens consumed, by kind (input, output)',
+  ['kind', 'model']
+));
+
+export function recordClaudeTokens(model: string, usage: any): void {
+  claudeTokensTotal.inc({ kind: 'input', model }, usage.input_tokens || 0);
+  claudeTokensTotal.inc({ kind: 'output', model }, usage.output_tokens || 0);
+}
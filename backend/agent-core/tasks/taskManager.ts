@@ -1,6 +1,7 @@
 import { createClient, SupabaseClient } from '@supabase/supabase-js';
 import { Task, TaskStatus, AgentType, ExecutionMode, TaskMetadata, AIEngine } from '../../types';
 import { Logger } from '../logger/logger';
+import { appConfig } from '../config/config';
 import { v4 as uuidv4 } from 'uuid';
 
 export class TaskManager {
@@ -10,8 +11,8 @@ export class TaskManager {
   private taskTimeouts: Map<string, NodeJS.Timeout> = new Map();
 
   constructor(logger: Logger) {
-    const supabaseUrl = process.env.SUPABASE_URL;
-    const supabaseKey = process.env.SUPABASE_SERVICE_ROLE_KEY;
+    const supabaseUrl = appConfig.supabaseUrl;
+    const supabaseKey = appConfig.supabaseServiceRoleKey;
 
     if (!supabaseUrl || !supabaseKey) {
       throw new Error('SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables are required');
@@ -40,7 +41,7 @@ export class TaskManager {
       metadata: {
         priority: metadata?.priority || 1,
         retry_count: 0,
-        ai_engine: metadata?.ai_engine || (process.env.DEFAULT_AI_ENGINE as AIEngine) || 'claude',
+        ai_engine: metadata?.ai_engine || appConfig.defaultAiEngine,
         estimated_duration_ms: metadata?.estimated_duration_ms,
         ...metadata
       }
@@ -103,7 +104,7 @@ export class TaskManager {
       }
 
       // Set timeout for task
-      const timeoutMs = parseInt(process.env.TASK_TIMEOUT_MS || '300000'); // 5 minutes default
+      const timeoutMs = appConfig.taskTimeoutMs;
       const timeout = setTimeout(() => {
         this.timeoutTask(taskId);
       }, timeoutMs);
@@ -243,7 +244,7 @@ export class TaskManager {
       }, new Error(errorStack || errorMessage));
 
       // Check if we should retry
-      const maxRetries = parseInt(process.env.MAX_RETRY_ATTEMPTS || '2');
+      const maxRetries = appConfig.maxRetryAttempts;
       if (updatedMetadata.retry_count < maxRetries) {
         await this.logger.info('orchestrator', `Scheduling retry for task: ${taskId}`, {
           task_id: taskId,
@@ -0,0 +1,70 @@
+import cluster from 'cluster';
+import { appConfig } from '../agent-core/config/config';
+
+// Each worker runs its own server, agent system and Claude connection pool.
+// Execution locks, Socket.IO broadcasts and /metrics counters are
+// per-process, so only raise WEB_CONCURRENCY behind a sticky-session load
+// balancer, and expect /metrics to report a single worker per scrape.
+const workers = appConfig.nodeEnv === 'development' ? 1 : appConfig.webConcurrency;
+
+if (cluster.isPrimary && workers > 1) {
+  console.log(`🧵 Starting ${workers} API workers`);
+
+  for (let i = 0; i < workers; i++) {
+    cluster.fork();
+  }
+
+  // Only workers that got as far as listening are replaced. One that dies
+  // during startup (missing env, bad config) would fail the same way again,
+  // so respawning it would just spin.
+  const listening = new Set<number>();
+  let shuttingDown = false;
+
+  cluster.on('listening', (worker) => {
+    listening.add(worker.id);
+  });
+
+  cluster.on('exit', (worker, code, signal) => {
+    const wasListening = listening.delete(worker.id);
+
+    if (shuttingDown) {
+      if (Object.keys(cluster.workers || {}).length === 0) {
+        console.log('All API workers stopped');
+        process.exit(0);
+      }
+      return;
+    }
+
+    if (signal === 'SIGTERM' || signal === 'SIGINT' || code === 0) return;
+
+    if (wasListening) {
+      console.error(`Worker ${worker.process.pid} exited (${signal || code}), restarting`);
+      cluster.fork();
+      return;
+    }
+
+    console.error(`Worker ${worker.process.pid} exited (${signal || code}) before listening, not restarting`);
+    if (Object.keys(cluster.workers || {}).length === 0) {
+      console.error('No API workers left, exiting');
+      process.exit(1);
+    }
+  });
+
+  // Orchestrators signal only the primary. Pass the signal on so each worker
+  // drains its server and connection pool, and stay up until they all exit;
+  // dying first would drop the workers' IPC channel and end them abruptly.
+  const shutdown = (signal: NodeJS.Signals) => {
+    if (shuttingDown) return;
+    shuttingDown = true;
+
+    console.log(`${signal} received, stopping API workers`);
+    for (const worker of Object.values(cluster.workers || {})) {
+      worker?.process.kill(signal);
+    }
+  };
+
+  process.on('SIGTERM', () => shutdown('SIGTERM'));
+  process.on('SIGINT', () => shutdown('SIGINT'));
+} else {
+  require('./server');
+}
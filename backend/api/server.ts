@@ -1,27 +1,37 @@
 import express from 'express';
 import cors from 'cors';
 import { createServer } from 'http';
+import { createHash } from 'crypto';
 import { Server as SocketIOServer } from 'socket.io';
-import dotenv from 'dotenv';
 import ClaudeAgentSystem from '../agent-core/agent';
-import { AgentConfig, APIResponse, ExecutionMode, AIEngine } from '../types';
-
-// Load environment variables
-dotenv.config();
+import { appConfig } from '../agent-core/config/config';
+import { metricsRegistry } from '../agent-core/metrics/metrics';
+import { AgentConfig, APIResponse, ExecutionMode, AIEngine, AIRequest } from '../types';
 
 const app = express();
 const server = createServer(app);
+
+// Hold idle keep-alive sockets open longer than common load balancer idle
+// timeouts (60s) so connections get reused instead of racing a server close
+server.keepAliveTimeout = 65000;
+server.headersTimeout = 66000;
+
+const allowedOrigins = [...appConfig.frontendUrls];
+
 const io = new SocketIOServer(server, {
   cors: {
-    origin: process.env.FRONTEND_URL || "http://localhost:3000",
+    origin: allowedOrigins,
     methods: ["GET", "POST"]
   }
 });
 
 // Middleware
 app.use(cors({
-  origin: process.env.FRONTEND_URL || "http://localhost:3000",
-  credentials: true
+  origin: allowedOrigins,
+  methods: ["GET", "POST"],
+  allowedHeaders: ["Authorization", "Content-Type"],
+  credentials: true,
+  maxAge: 86400 // Let browsers cache preflight results for a day
 }));
 app.use(express.json());
 
@@ -38,11 +48,14 @@ try {
 }
 
 // WebSocket connection handling
+// Per-connection lines are access-log noise, so only print them when debugging
+const logConnections = appConfig.logLevel === 'debug';
+
 io.on('connection', (socket) => {
-  console.log('Client connected:', socket.id);
+  if (logConnections) console.log('Client connected:', socket.id);
   
   socket.on('disconnect', () => {
-    console.log('Client disconnected:', socket.id);
+    if (logConnections) console.log('Client disconnected:', socket.id);
   });
 });
 
@@ -93,6 +106,18 @@ app.get('/api/health', (req, res) => {
   });
 });
 
+// Liveness probe - body and ETag are built once at startup, so frequent
+// load balancer probes skip serialization and can revalidate with a 304
+const LIVENESS_BODY = Buffer.from(JSON.stringify({ success: true, status: 'alive' }));
+const LIVENESS_ETAG = `"${createHash('md5').update(LIVENESS_BODY).digest('hex')}"`;
+
+app.get('/api/health/live', (req, res) => {
+  res
+    .set({ 'Cache-Control': 'public, max-age=10', 'ETag': LIVENESS_ETAG })
+    .type('application/json')
+    .send(LIVENESS_BODY);
+});
+
 // System health detailed
 app.get('/api/system/health', async (req, res) => {
   try {
@@ -298,6 +323,68 @@ app.get('/api/agent/tasks', async (req, res) => {
   }
 });
 
+// Stream a Claude completion as plain text. The endpoint is public, so the
+// system prompt stays server-side and completion length is capped.
+const MAX_GENERATE_TOKENS = 4000;
+
+app.post('/api/ai/generate', async (req, res) => {
+  const { prompt, context, max_tokens, temperature, fast } = req.body;
+
+  if (typeof prompt !== 'string' || !prompt.trim()) {
+    return res.status(400).json({
+      success: false,
+      error: 'Prompt is required and must be a string'
+    });
+  }
+
+  if (context !== undefined && typeof context !== 'string') {
+    return res.status(400).json({
+      success: false,
+      error: 'Context must be a string'
+    });
+  }
+
+  const request: AIRequest = {
+    prompt,
+    context,
+    max_tokens: Number.isInteger(max_tokens) && max_tokens > 0
+      ? Math.min(max_tokens, MAX_GENERATE_TOKENS)
+      : MAX_GENERATE_TOKENS,
+    temperature: typeof temperature === 'number' && temperature >= 0 && temperature <= 1
+      ? temperature
+      : undefined,
+    fast: fast === true
+  };
+
+  try {
+    for await (const chunk of agentSystem.streamAIResponse(request)) {
+      // Stop generating (and paying for) tokens nobody will read
+      if (res.destroyed) break;
+
+      // Wait for the first chunk so upstream failures still get a JSON error
+      if (!res.headersSent) {
+        res.setHeader('Content-Type', 'text/plain; charset=utf-8');
+      }
+      res.write(chunk);
+    }
+
+    res.end();
+  } catch (error) {
+    if (res.headersSent) {
+      // Abort the response so the client can't mistake a partial
+      // completion for a finished one
+      res.destroy(error instanceof Error ? error : new Error(String(error)));
+      return;
+    }
+
+    res.status(500).json({
+      success: false,
+      error: 'AI generation failed',
+      details: error instanceof Error ? error.message : String(error)
+    });
+  }
+});
+
 // Test Claude connection
 app.post('/api/test/claude', async (req, res) => {
   try {
@@ -325,6 +412,14 @@ app.post('/api/test/claude', async (req, res) => {
   }
 });
 
+// Prometheus metrics (Claude latency/token counters plus process basics).
+// The registry lives in this process only: behind the cluster launcher each
+// scrape hits one arbitrary worker, so totals are only complete with one.
+app.get('/metrics', (req, res) => {
+  res.set('Content-Type', metricsRegistry.contentType);
+  res.end(metricsRegistry.metrics());
+});
+
 // Error handling middleware
 app.use((error: Error, req: express.Request, res: express.Response, next: express.NextFunction) => {
   console.error('API Error:', error);
@@ -332,7 +427,7 @@ app.use((error: Error, req: express.Request, res: express.Response, next: expres
   res.status(500).json({
     success: false,
     error: 'Internal server error',
-    details: process.env.NODE_ENV === 'development' ? error.message : 'An unexpected error occurred'
+    details: appConfig.nodeEnv === 'development' ? error.message : 'An unexpected error occurred'
   });
 });
 
@@ -361,31 +456,36 @@ setInterval(() => {
 }, 30000); // Every 30 seconds
 
 // Start server
-const PORT = process.env.PORT || 3001;
+const PORT = appConfig.port;
 
 server.listen(PORT, () => {
   console.log(`🚀 Claude Agent API Server running on port ${PORT}`);
   console.log(`📊 Health check: http://localhost:${PORT}/api/health`);
-  console.log(`🌐 Frontend URL: ${process.env.FRONTEND_URL || 'http://localhost:3000'}`);
-  console.log(`🔧 Environment: ${process.env.NODE_ENV || 'development'}`);
+  console.log(`🌐 Frontend URL: ${appConfig.frontendUrls.join(', ')}`);
+  console.log(`🔧 Environment: ${appConfig.nodeEnv}`);
   
   // Broadcast server startup
   BroadcastLogger.log('info', 'orchestrator', 'API Server started successfully');
 });
 
 // Graceful shutdown
-process.on('SIGTERM', () => {
-  console.log('SIGTERM received, shutting down gracefully');
-  server.close(() => {
-    process.exit(0);
-  });
-});
+// A signal can arrive twice (e.g. Ctrl+C reaches both the cluster primary and
+// its workers), and a second server.close() would fail straight to exit
+let shuttingDown = false;
+
+function shutdown(signal: NodeJS.Signals) {
+  if (shuttingDown) return;
+  shuttingDown = true;
 
-process.on('SIGINT', () => {
-  console.log('SIGINT received, shutting down gracefully');
+  console.log(`${signal} received, shutting down gracefully`);
+  // Release pooled Claude sockets only after in-flight requests have drained
   server.close(() => {
+    agentSystem.shutdown();
     process.exit(0);
   });
-});
+}
+
+process.on('SIGTERM', () => shutdown('SIGTERM'));
+process.on('SIGINT', () => shutdown('SIGINT'));
 
 export default app;
\ No newline at end of file
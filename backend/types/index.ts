@@ -85,6 +85,8 @@ export interface AIRequest {
   max_tokens?: number;
   temperature?: number;
   response_format?: 'text' | 'json';
+  fast?: boolean; // Force the low-latency model regardless of request size
+  stage?: AgentType; // Metrics label for the agent issuing the request
 }
 
 export interface AIResponse {